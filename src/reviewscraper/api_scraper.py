@@ -2,7 +2,8 @@ import base64
 import brotli
 import json
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Any, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
 from seleniumwire import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
@@ -11,7 +12,13 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
+from .cache import ResponseCache, page_key_from_url
 from .config import Settings
+from .models import Review, Reviewer
+from .ratelimit import get_limiter
+
+# Seconds to wait for the review page a scroll should trigger
+REVIEW_RESPONSE_TIMEOUT = 10
 
 def init_api_driver(headless: bool = True) -> webdriver.Chrome:
     """Initialize a Selenium Wire Chrome driver."""
@@ -53,27 +60,48 @@ def init_api_driver(headless: bool = True) -> webdriver.Chrome:
     
     return driver
 
-def extract_reviews_from_api(response_body: bytes) -> List[Dict[str, Any]]:
+def decode_api_response(response_body: bytes) -> Any:
+    """Decompress and parse a listugcposts response body."""
+    # Decompress the brotli-compressed data
+    try:
+        decompressed = brotli.decompress(response_body)
+        content = decompressed.decode('utf-8')
+    except Exception as e:
+        print(f"Decompression failed: {e}. Treating as raw content.")
+        content = response_body.decode('utf-8', errors='replace')
+
+    # Handle Google's response format which often starts with ")]}',"
+    if content.startswith(")]}'"):
+        content = content[4:]
+    
+    # Parse the JSON response
+    return json.loads(content)
+
+def page_token(data: Any) -> Optional[str]:
+    """Return the continuation token (data[1]) of a parsed listugcposts page."""
+    if isinstance(data, list) and len(data) > 1 and isinstance(data[1], str) and data[1]:
+        return data[1]
+    return None
+
+def is_empty_page(data: Any) -> bool:
+    """True when a parsed listugcposts page carries no review blocks (data[2])."""
+    return not (isinstance(data, list) and len(data) > 2 and data[2])
+
+def extract_reviews_from_api(response_body: bytes) -> List[Review]:
     """Extract review data from the API response."""
+    return parse_review_page(response_body)[1]
+
+def parse_review_page(response_body: bytes) -> Tuple[Any, List[Review]]:
+    """Parse a listugcposts response into (decoded data, reviews).
+
+    The data is None when the body could not be decoded.
+    """
     try:
         # Save raw response for debugging
         with open("raw_response.bin", "wb") as f:
             f.write(response_body)
-            
-        # Decompress the brotli-compressed data
-        try:
-            decompressed = brotli.decompress(response_body)
-            content = decompressed.decode('utf-8')
-        except Exception as e:
-            print(f"Decompression failed: {e}. Treating as raw content.")
-            content = response_body.decode('utf-8', errors='replace')
-
-        # Handle Google's response format which often starts with ")]}',"
-        if content.startswith(")]}'"):
-            content = content[4:]
         
-        # Parse the JSON response
-        data = json.loads(content)
+        data = decode_api_response(response_body)
         
         # For debugging, save the full response to inspect structure
         with open("api_response_debug.json", "w", encoding="utf-8") as f:
@@ -88,7 +116,7 @@ def extract_reviews_from_api(response_body: bytes) -> List[Dict[str, Any]]:
             
             if not isinstance(review_blocks, list):
                 print("Expected review_blocks to be a list, but it's not.")
-                return []
+                return data, []
             
             for review_block in review_blocks:
                 if not review_block or not isinstance(review_block, list) or len(review_block) < 1:
@@ -97,15 +125,15 @@ def extract_reviews_from_api(response_body: bytes) -> List[Dict[str, Any]]:
                 # Extract basic review info
                 try:
                     # Extract reviewer info
-                    reviewer_info = {}
+                    reviewer_info = Reviewer()
                     if len(review_block) > 0 and isinstance(review_block[0], list) and len(review_block[0]) > 5:
                         reviewer_data = review_block[0]
                         if reviewer_data and len(reviewer_data) > 2:
-                            reviewer_info = {
-                                "name": reviewer_data[1][4][5][0] if reviewer_data[0] else "Unknown",
-                                "profile_url": reviewer_data[1][4][5][2][0] if len(reviewer_data) > 2 else None,
-                                "profile_pic": reviewer_data[1][4][5][1] if len(reviewer_data) > 1 else None
-                            }
+                            reviewer_info = Reviewer(
+                                name=reviewer_data[1][4][5][0] if reviewer_data[0] else "Unknown",
+                                profile_url=reviewer_data[1][4][5][2][0] if len(reviewer_data) > 2 else None,
+                                profile_pic=reviewer_data[1][4][5][1] if len(reviewer_data) > 1 else None
+                            )
                     
                     # Extract rating
                     rating = None
@@ -120,12 +148,25 @@ def extract_reviews_from_api(response_body: bytes) -> List[Dict[str, Any]]:
                     if len(review_block) > 0 and isinstance(review_block[0], list) and len(review_block[0]) > 3:
                         review_date = review_block[0][1][3]
                     
-                    review = {
-                        "reviewer": reviewer_info,
-                        "stars": rating,
-                        "text": review_text,
-                        "date": review_date,
-                    }
+                    # Extract attached photos, if any
+                    photos = []
+                    try:
+                        for photo_data in review_block[0][2][2] or []:
+                            photos.append(photo_data[1][6][0])
+                    except (IndexError, TypeError):
+                        pass
+                    
+                    # Stable ID Google assigns to the review
+                    review_id = review_block[0][0] if isinstance(review_block[0][0], str) else None
+                    
+                    review = Review(
+                        reviewer=reviewer_info,
+                        stars=rating,
+                        text=review_text,
+                        date=review_date,
+                        photos=photos,
+                        review_id=review_id,
+                    )
                     
                     reviews.append(review)
                     
@@ -133,24 +174,157 @@ def extract_reviews_from_api(response_body: bytes) -> List[Dict[str, Any]]:
                     print(f"Error extracting review data: {e}")
                     continue
                     
-        return reviews
+        return data, reviews
     except Exception as e:
         print(f"Error extracting reviews from API: {str(e)}")
-        return []
+        return None, []
+
+def open_response_cache(cfg: Settings) -> ResponseCache:
+    assert cfg.cache_dir is not None
+    return ResponseCache(cfg.cache_dir, ttl=cfg.cache_ttl,
+                         max_bytes=cfg.cache_max_mb * 1024 * 1024)
+
+def cache_response(cache: ResponseCache, request) -> Optional[str]:
+    """Store a captured listugcposts response under its place, sort order and page token.
+
+    Returns the cache key, or None if the URL carries no place ID.
+    """
+    key = page_key_from_url(request.url)
+    if not key:
+        return None
+    headers = {}
+    for name in ('content-type', 'content-encoding'):
+        value = request.response.headers.get(name)
+        if value:
+            headers[name] = value
+    cache.put(key, request.response.body, headers)
+    return key
+
+def iter_cached_pages(cfg: Settings, cache: ResponseCache) -> Iterator[List[bytes]]:
+    """Yield the cached response bodies of each scroll iteration of the recorded scrape.
+
+    Replays the pages the last live scrape of cfg.place_url consumed, in
+    order, for at most cfg.scroll_iterations iterations.
+    """
+    run = cache.lookup_run(cfg.place_url, cfg.sort_direction)
+    if not run:
+        raise ValueError(f"No cached pages for {cfg.place_url}; run once without --cache-only")
+    iterations, complete = run
+    
+    for i, keys in enumerate(iterations[:cfg.scroll_iterations]):
+        bodies: List[bytes] = []
+        for key in keys:
+            # Replays must be reproducible, so expired pages are still used
+            entry = cache.get(key, allow_stale=True)
+            if entry is None:
+                print(f"Warning: cached page {key} of iteration {i + 1} is missing "
+                      "(evicted?); the replay stops here")
+                if bodies:
+                    yield bodies
+                return
+            bodies.append(entry[0])
+        yield bodies
+    
+    if cfg.scroll_iterations > len(iterations) and not complete:
+        print(f"Warning: the cache only covers {len(iterations)} of {cfg.scroll_iterations} "
+              "iterations; run without --cache-only to fetch the rest")
+
+def place_load_blocked(driver) -> Optional[str]:
+    """Return why the place page load looks throttled or blocked, or None if it loaded."""
+    current = urlsplit(driver.current_url)
+    if current.netloc.startswith("consent.") or current.path.startswith("/sorry/"):
+        return f"redirected to {driver.current_url}"
+    for request in driver.requests:
+        response = request.response
+        if response and response.headers.get('content-type', '').startswith('text/html'):
+            if response.status_code == 429 or response.status_code >= 500:
+                return f"HTTP {response.status_code} for {request.url}"
+    return None
 
 def scrape_reviews_api(cfg: Settings, save_callback=None):
     """Scrape reviews using the Google Maps API directly with incremental saving."""
-    driver = init_api_driver(cfg.headless)
     all_reviews = []
+    seen = set()
     total_saved = 0
     is_first_batch = True
     
+    def handle_batch(new_reviews):
+        nonlocal total_saved, is_first_batch
+        
+        # Filter out reviews we've already processed
+        unique_new_reviews = []
+        for review in new_reviews:
+            # Only the review ID (or a digest) is remembered, so saved records can be freed
+            key = review.fingerprint()
+            if key not in seen:
+                seen.add(key)
+                unique_new_reviews.append(review)
+        
+        # Only keep the full collection when it is the return value
+        if not save_callback:
+            all_reviews.extend(unique_new_reviews)
+        
+        # Save this batch if we have a callback
+        if save_callback and unique_new_reviews:
+            saved = save_callback(unique_new_reviews, cfg, is_first_batch)
+            total_saved += saved
+            is_first_batch = False
+            print(f"Saved {saved} reviews (total: {total_saved})")
+    
+    cache = open_response_cache(cfg) if cfg.cache_dir else None
+    
+    if cfg.cache_only:
+        if cache is None:
+            raise ValueError("cache_only requires cache_dir")
+        try:
+            for bodies in iter_cached_pages(cfg, cache):
+                reviews = []
+                for body in bodies:
+                    reviews.extend(extract_reviews_from_api(body))
+                print(f"Replayed {len(reviews)} reviews from cache")
+                handle_batch(reviews)
+            return total_saved if save_callback else all_reviews
+        finally:
+            cache.close()
+    
+    # Limiters are shared by every scrape in this process (and across
+    # processes when rate_limit_dir is set)
+    place_limiter = get_limiter("place", cfg.place_rate_limit, cfg.rate_limit_dir)
+    review_limiter = get_limiter("listugcposts", cfg.rate_limit, cfg.rate_limit_dir)
+    
+    driver = init_api_driver(cfg.headless)
+    
+    # Answer review page requests we already have straight from the cache
+    served_from_cache = set()
+    if cache:
+        def serve_from_cache(request):
+            if "listugcposts" not in request.url:
+                return
+            key = page_key_from_url(request.url)
+            if not key:
+                return
+            entry = cache.get(key)
+            if entry:
+                body, headers = entry
+                request.create_response(status_code=200, headers=headers, body=body)
+                served_from_cache.add(request.url)
+        
+        driver.request_interceptor = serve_from_cache
+    
     try:
         # Navigate to the place page and wait for it to load
+        place_limiter.wait()
         driver.get(cfg.place_url)
         print("Waiting for page to load...")
         time.sleep(5)  # Give more time for initial page load
         
+        blocked = place_load_blocked(driver)
+        if blocked:
+            delay = place_limiter.throttled()
+            print(f"Place page load throttled ({blocked}); backing off {delay:.1f}s")
+            raise RuntimeError(f"Place page load throttled: {blocked}")
+        place_limiter.success()
+        
         # Clear request history
         driver.requests.clear()
         print("Cleared request history")
@@ -282,9 +456,16 @@ def scrape_reviews_api(cfg: Settings, save_callback=None):
         driver.scopes = [r'.*maps/rpc/listugcposts.*']
         print("Set request scope to specifically target review API endpoints")
         
+        # Cache keys of the pages each iteration consumed, for --cache-only replays
+        run_pages: List[List[str]] = []
+        last_page = False
+        
         # Scroll to trigger more review loads
         print(f"Scrolling the review container for {cfg.scroll_iterations} iterations...")
         for i in range(cfg.scroll_iterations):
+            # Wait for our turn to trigger another review page request
+            review_limiter.wait()
+            
             # Scroll the review container
             if review_container:
                 driver.execute_script("""document.querySelector('div[jslog="26354;mutable:true;"]').scrollBy(0, 10000)""")
@@ -293,41 +474,81 @@ def scrape_reviews_api(cfg: Settings, save_callback=None):
                 driver.execute_script("""window.scrollBy(0, 10000)""")
                 print(f"Scrolled window (iteration {i+1}/{cfg.scroll_iterations})")
             
-            # Wait for new reviews to load
-            time.sleep(2)
+            # Wait for the review page response itself; the limiter, not a
+            # fixed sleep, sets the pace between scrolls
+            try:
+                driver.wait_for_request("listugcposts", timeout=REVIEW_RESPONSE_TIMEOUT)
+            except TimeoutException:
+                print(f"No review response within {REVIEW_RESPONSE_TIMEOUT}s")
             
             # Process any new review API requests
             new_reviews = []
+            page_keys: List[str] = []
+            throttled = False
+            responded = False
             for request in driver.requests:
                 if "listugcposts" in request.url and request.response:
-                    try:
-                        reviews = extract_reviews_from_api(request.response.body)
-                        if reviews:
-                            print(f"Extracted {len(reviews)} new reviews")
-                            new_reviews.extend(reviews)
-                    except Exception as e:
-                        print(f"Error processing response: {str(e)}")
-            
-            # Filter out reviews we've already processed
-            unique_new_reviews = [r for r in new_reviews if r not in all_reviews]
+                    status = request.response.status_code
+                    if status == 429 or status >= 500:
+                        print(f"Review request throttled (HTTP {status})")
+                        throttled = True
+                        continue
+                    data, reviews = parse_review_page(request.response.body)
+                    if data is None:
+                        continue
+                    # Pages answered from the cache say nothing about Google's limits
+                    from_cache = request.url in served_from_cache
+                    if page_token(data) is None:
+                        # No continuation token: this is the last page
+                        last_page = True
+                    elif is_empty_page(data):
+                        print("Review request returned an empty page")
+                        if not from_cache:
+                            throttled = True
+                        continue
+                    if not from_cache:
+                        responded = True
+                    if cache:
+                        if from_cache:
+                            key = page_key_from_url(request.url)
+                        else:
+                            key = cache_response(cache, request)
+                        if key:
+                            page_keys.append(key)
+                    if reviews:
+                        print(f"Extracted {len(reviews)} new reviews")
+                        new_reviews.extend(reviews)
             
-            # Add to our full collection
-            all_reviews.extend(unique_new_reviews)
+            # Back off on throttling signals and probe a faster rate after a
+            # good page; an iteration without any response is neutral
+            if throttled:
+                delay = review_limiter.throttled()
+                print(f"Backing off {delay:.1f}s (rate now {review_limiter.rate:.2f} req/s)")
+            elif responded:
+                review_limiter.success()
             
-            # Save this batch if we have a callback
-            if save_callback and unique_new_reviews:
-                saved = save_callback(unique_new_reviews, cfg, is_first_batch)
-                total_saved += saved
-                is_first_batch = False
-                print(f"Saved {saved} reviews (total: {total_saved})")
+            handle_batch(new_reviews)
+            run_pages.append(page_keys)
             
             # Clear processed requests to save memory
             driver.requests.clear()
+            
+            if last_page:
+                print("Reached the last page of reviews")
+                break
+        
+        if cache:
+            cache.remember_run(cfg.place_url, cfg.sort_direction, run_pages, last_page)
         
         return total_saved if save_callback else all_reviews
         
     finally:
         driver.quit()
+        if cache:
+            stats = cache.stats()
+            print(f"Response cache: {stats['hits']} hits, {stats['misses']} misses "
+                  f"({stats['hit_rate']:.0%} hit rate), {stats['stores']} stored")
+            cache.close()
 
 def parse_google_maps_response(file_path):
     with open(file_path, 'r', encoding='utf-8') as f:
@@ -379,15 +600,17 @@ def extract_reviews(data):
                             photo_url = photo_data[0][6][0]
                             photos.append(photo_url)
                 
-                review = {
-                    "reviewer_name": reviewer_name,
-                    "reviewer_profile_url": reviewer_profile_url,
-                    "reviewer_profile_pic": reviewer_profile_pic,
-                    "date": review_date,
-                    "rating": rating,
-                    "text": review_text,
-                    "photos": photos
-                }
+                review = Review(
+                    reviewer=Reviewer(
+                        name=reviewer_name,
+                        profile_url=reviewer_profile_url,
+                        profile_pic=reviewer_profile_pic
+                    ),
+                    stars=rating,
+                    text=review_text,
+                    date=review_date,
+                    photos=photos
+                )
                 
                 reviews.append(review)
                 
@@ -0,0 +1,174 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+# listugcposts?...&pb=!1m6!1s0x2e7a...:0x82fe...!6m4...!2m2!1i10!2s<token>!5m2...!13m1!1e2
+_PLACE_ID = re.compile(r'!1s(0x[0-9a-f]+:0x[0-9a-f]+)')
+_PAGE_TOKEN = re.compile(r'!2m2!1i\d+!2s([^!&]*)')
+_SORT_ORDER = re.compile(r'!13m1!1e(\d+)')
+
+def place_id_from_url(url: str) -> Optional[str]:
+    """Return the ``0x...:0x...`` place ID embedded in a Maps or listugcposts URL."""
+    match = _PLACE_ID.search(unquote(url))
+    return match.group(1) if match else None
+
+def page_token_from_url(url: str) -> str:
+    """Return the continuation token a listugcposts request asks for ("" for page one).
+
+    It is the ``data[1]`` token of the previous page's response.
+    """
+    match = _PAGE_TOKEN.search(url)
+    return unquote(match.group(1)) if match else ""
+
+def sort_order_from_url(url: str) -> str:
+    """Return the sort order a listugcposts request asks for ("default" if none)."""
+    match = _SORT_ORDER.search(url)
+    return match.group(1) if match else "default"
+
+def page_key(place_id: str, sort_order: str, token: str) -> str:
+    # The first page differs per sort order, so the sort is part of the key too
+    return f"{place_id}|{sort_order}|{token}"
+
+def page_key_from_url(url: str) -> Optional[str]:
+    """Build the cache key of a listugcposts request from its own ``pb`` parameter."""
+    place_id = place_id_from_url(url)
+    if not place_id:
+        return None
+    return page_key(place_id, sort_order_from_url(url), page_token_from_url(url))
+
+class ResponseCache:
+    """On-disk cache of review page responses with a TTL and LRU size bound.
+
+    Bodies are stored zlib-compressed in an SQLite file next to their
+    headers. Once the stored bytes exceed ``max_bytes`` the least recently
+    used pages are evicted. Hit/miss counters are kept for ``stats``.
+
+    Next to the pages it records which page keys each scroll iteration of
+    the latest scrape of a place consumed, so that scrape can be replayed
+    exactly, including the default-sort first page.
+    """
+
+    def __init__(self, root: str, ttl: Optional[float] = 7 * 24 * 3600,
+                 max_bytes: int = 256 * 1024 * 1024):
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(root, "responses.db"), timeout=30, check_same_thread=False
+        )
+        with self._lock, self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS pages (
+                       key         TEXT PRIMARY KEY,
+                       body        BLOB NOT NULL,
+                       headers     TEXT NOT NULL,
+                       size        INTEGER NOT NULL,
+                       stored_at   REAL NOT NULL,
+                       accessed_at REAL NOT NULL
+                   )"""
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)"
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS runs (
+                       place_url      TEXT NOT NULL,
+                       sort_direction TEXT NOT NULL,
+                       pages          TEXT NOT NULL,
+                       complete       INTEGER NOT NULL,
+                       recorded_at    REAL NOT NULL,
+                       PRIMARY KEY (place_url, sort_direction)
+                   )"""
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        """Return ``(body, headers)`` for a fresh entry, or None on a miss."""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT body, headers, stored_at FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+            if row and not allow_stale and self.ttl is not None and now - row[2] > self.ttl:
+                self._conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return zlib.decompress(row[0]), json.loads(row[1])
+
+    def put(self, key: str, body: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+        """Store a page, then evict least recently used pages beyond ``max_bytes``."""
+        blob = zlib.compress(body)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                (key, blob, json.dumps(headers or {}), len(blob), now, now),
+            )
+            self.stores += 1
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+            while total > self.max_bytes:
+                row = self._conn.execute(
+                    "SELECT key, size FROM pages ORDER BY accessed_at LIMIT 1"
+                ).fetchone()
+                if row is None or row[0] == key:
+                    break
+                self._conn.execute("DELETE FROM pages WHERE key = ?", (row[0],))
+                self.evictions += 1
+                total -= row[1]
+
+    def remember_run(self, place_url: str, sort_direction: str,
+                     pages: List[List[str]], complete: bool) -> None:
+        """Record the page keys each scroll iteration of a scrape consumed.
+
+        ``complete`` means the scrape reached the last page. The latest
+        scrape of a place URL and sort direction replaces the previous one.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?)",
+                (place_url, sort_direction, json.dumps(pages), int(complete), time.time()),
+            )
+
+    def lookup_run(self, place_url: str, sort_direction: str) -> Optional[Tuple[List[List[str]], bool]]:
+        """Return ``(pages per iteration, complete)`` recorded for a place URL and sort."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT pages, complete FROM runs WHERE place_url = ? AND sort_direction = ?",
+                (place_url, sort_direction),
+            ).fetchone()
+        return (json.loads(row[0]), bool(row[1])) if row else None
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
@@ -3,7 +3,16 @@ import csv
 import json
 import os
 from .api_scraper import scrape_reviews_api
+from .cache import ResponseCache
 from .config import Settings
+from .jobqueue import LeaseLost, SQLiteJobQueue, run_worker
+from .media import MediaCache, MediaDownloader, download_review_media
+
+CSV_FIELDNAMES = [
+    'reviewer_name', 'reviewer_profile_url', 'reviewer_profile_pic',
+    'stars', 'text', 'date', 'photos',
+    'reviewer_profile_pic_path', 'photo_paths'
+]
 
 @click.command()
 @click.option('--url',     required=True, help="Google Maps place URL")
@@ -14,14 +23,24 @@ from .config import Settings
 @click.option('--format',  default="json", type=click.Choice(['json', 'csv']),
               help="Output file format (json or csv)")
 @click.option('--headless/--no-headless', default=True)
-def main(url, sort, iter, output, format, headless):
+@click.option('--media-dir', default=None, help="Download review photos and avatars into this directory")
+@click.option('--media-size', default=None, type=int, help="Fetch images resized to this many pixels")
+@click.option('--media-workers', default=8, type=int, help="Number of concurrent media downloads")
+@click.option('--rate-limit', default=None, type=float, help="Starting review page requests per second")
+@click.option('--rate-state-dir', default=None, help="Directory to share rate limits with other processes")
+@click.option('--cache-dir', default=None, help="Cache review page responses in this directory")
+@click.option('--cache-ttl', default=7 * 24 * 3600, type=float, help="Seconds before a cached page is refetched")
+@click.option('--cache-max-mb', default=256, type=int, help="Maximum size of the response cache in MB")
+@click.option('--cache-only', is_flag=True, help="Replay reviews from --cache-dir without opening a browser")
+def main(url, sort, iter, output, format, headless, media_dir, media_size, media_workers,
+         rate_limit, rate_state_dir, cache_dir, cache_ttl, cache_max_mb, cache_only):
+    if cache_only and not cache_dir:
+        raise click.UsageError("--cache-only requires --cache-dir")
+    
     # Determine output file path with correct extension
     if not output.lower().endswith(f'.{format}'):
         output = f"{output.rsplit('.', 1)[0]}.{format}"
     
-    # Initialize output files with headers
-    init_output_file(output, format)
-    
     # Create config
     cfg = Settings(
         place_url=url,
@@ -29,18 +48,168 @@ def main(url, sort, iter, output, format, headless):
         scroll_iterations=iter,
         output_path=output,
         headless=headless,
-        output_format=format  # Add format to settings
+        output_format=format,  # Add format to settings
+        media_dir=media_dir,
+        media_size=media_size,
+        media_workers=media_workers,
+        rate_limit=rate_limit,
+        rate_limit_dir=rate_state_dir,
+        cache_dir=cache_dir,
+        cache_ttl=cache_ttl,
+        cache_max_mb=cache_max_mb,
+        cache_only=cache_only
     )
     
+    total_reviews = run_scrape(cfg)
+    print(f"[✓] {total_reviews} reviews saved to {output}")
+
+def run_scrape(cfg, lease_lost=None):
+    """Scrape one place into cfg.output_path, saving reviews incrementally.
+    
+    When ``lease_lost`` (a threading.Event) gets set, the next batch raises
+    LeaseLost instead of writing to an output file another worker now owns.
+    """
+    if cfg.cache_only:
+        require_cached_place(cfg)
+    
+    # Initialize output files with headers
+    init_output_file(cfg.output_path, cfg.output_format)
+    
+    downloader = None
+    if cfg.media_dir:
+        cache = MediaCache(cfg.media_dir)
+        downloader = MediaDownloader(cache, max_workers=cfg.media_workers, size=cfg.media_size)
+    
+    def save(reviews, config, is_first_batch=False):
+        if lease_lost is not None and lease_lost.is_set():
+            raise LeaseLost(f"Lease lost while scraping {cfg.place_url}")
+        if downloader:
+            downloaded = download_review_media(reviews, downloader)
+            print(f"Downloaded {downloaded} media files to {cfg.media_dir}")
+        return save_reviews_batch(reviews, config, is_first_batch)
+    
     # Call scraper with incremental saving
-    total_reviews = scrape_reviews_api(cfg, save_callback=save_reviews_batch)
+    try:
+        total_reviews = scrape_reviews_api(cfg, save_callback=save)
+    finally:
+        if downloader:
+            downloader.close()
+            downloader.cache.close()
     
     # Finalize the output file if needed (for JSON we need to close the array)
-    if format.lower() == 'json':
-        with open(output, 'a', encoding='utf-8') as f:
+    if cfg.output_format.lower() == 'json':
+        with open(cfg.output_path, 'a', encoding='utf-8') as f:
             f.write('\n]')
     
-    print(f"[✓] {total_reviews} reviews saved to {output}")
+    return total_reviews
+
+def require_cached_place(cfg):
+    """Fail before any output is written when --cache-only has nothing to replay."""
+    cache = ResponseCache(cfg.cache_dir)
+    try:
+        run = cache.lookup_run(cfg.place_url, cfg.sort_direction)
+    finally:
+        cache.close()
+    if not run:
+        raise click.ClickException(
+            f"No cached pages for {cfg.place_url} ({cfg.sort_direction}) in {cfg.cache_dir}; "
+            "run once without --cache-only"
+        )
+
+@click.group()
+def queue_cli():
+    """Distribute place URLs across scraping hosts through a shared job queue."""
+
+@queue_cli.command('enqueue')
+@click.option('--queue',   'queue_path', required=True, help="Path to the shared queue database")
+@click.option('--file',    'url_file', type=click.File('r', encoding='utf-8'),
+              help="File with one place URL per line")
+@click.option('--sort',    default="desc", type=click.Choice(['asc', 'desc']),
+              help="Sort reviews by date (asc=oldest first, desc=newest first)")
+@click.option('--iter',    default=15, type=int, help="Number of scroll iterations to load more reviews")
+@click.argument('urls', nargs=-1)
+def enqueue(queue_path, url_file, sort, iter, urls):
+    """Add place URLs to the queue."""
+    urls = list(urls)
+    if url_file:
+        urls.extend(line.strip() for line in url_file if line.strip())
+    
+    queue = SQLiteJobQueue(queue_path)
+    added = 0
+    for url in urls:
+        if queue.enqueue(url, {'sort_direction': sort, 'scroll_iterations': iter}) is not None:
+            added += 1
+    queue.close()
+    print(f"[✓] {added} jobs added ({len(urls) - added} already queued)")
+
+@queue_cli.command('work')
+@click.option('--queue',   'queue_path', required=True, help="Path to the shared queue database")
+@click.option('--output-dir', default="output", help="Directory for per-place output files")
+@click.option('--format',  default="json", type=click.Choice(['json', 'csv']),
+              help="Output file format (json or csv)")
+@click.option('--headless/--no-headless', default=True)
+@click.option('--visibility-timeout', default=300.0, type=float,
+              help="Seconds a lease survives without a heartbeat before the job is retried")
+@click.option('--max-attempts', default=3, type=int, help="Attempts before a job is marked failed")
+@click.option('--poll-interval', default=5.0, type=float, help="Seconds to wait when the queue is empty")
+@click.option('--exit-when-empty', is_flag=True, help="Stop instead of polling when no job is available")
+@click.option('--media-dir', default=None, help="Download review photos and avatars into this directory")
+@click.option('--media-size', default=None, type=int, help="Fetch images resized to this many pixels")
+@click.option('--rate-limit', default=None, type=float, help="Starting review page requests per second")
+@click.option('--rate-state-dir', default=None, help="Directory to share rate limits with other processes")
+@click.option('--cache-dir', default=None, help="Cache review page responses in this directory")
+def work(queue_path, output_dir, format, headless, visibility_timeout,
+         max_attempts, poll_interval, exit_when_empty, media_dir, media_size,
+         rate_limit, rate_state_dir, cache_dir):
+    """Lease jobs from the queue and scrape them until stopped."""
+    queue = SQLiteJobQueue(queue_path, max_attempts=max_attempts)
+    
+    # Each attempt writes to its own file, so a worker that lost its lease
+    # can never append to the output of the worker that took over the job
+    def attempt_path(job):
+        return os.path.join(output_dir, f".place-{job.id}.{job.token}.{format}.part")
+    
+    def handle(job):
+        cfg = Settings(
+            place_url=job.url,
+            output_path=attempt_path(job),
+            headless=headless,
+            output_format=format,
+            media_dir=media_dir,
+            media_size=media_size,
+            rate_limit=rate_limit,
+            rate_limit_dir=rate_state_dir,
+            cache_dir=cache_dir,
+            **job.options
+        )
+        total_reviews = run_scrape(cfg, lease_lost=job.lease_lost)
+        print(f"[✓] {total_reviews} reviews scraped for job {job.id}")
+    
+    def finish(job, acked):
+        partial = attempt_path(job)
+        if acked:
+            output = os.path.join(output_dir, f"place-{job.id}.{format}")
+            os.replace(partial, output)
+            print(f"[✓] Saved job {job.id} to {output}")
+        elif os.path.exists(partial):
+            os.remove(partial)
+    
+    try:
+        completed = run_worker(queue, handle, visibility_timeout=visibility_timeout,
+                               poll_interval=poll_interval, exit_when_empty=exit_when_empty,
+                               finish=finish)
+    finally:
+        queue.close()
+    print(f"[✓] Worker finished {completed} jobs")
+
+@queue_cli.command('status')
+@click.option('--queue',   'queue_path', required=True, help="Path to the shared queue database")
+def status(queue_path):
+    """Show the number of jobs per status."""
+    queue = SQLiteJobQueue(queue_path)
+    for state, count in sorted(queue.stats().items()):
+        print(f"{state}: {count}")
+    queue.close()
 
 def init_output_file(output_path, format):
     """Initialize the output file with headers or structure."""
@@ -54,15 +223,11 @@ def init_output_file(output_path, format):
     else:
         # For CSV, write headers
         with open(output_path, 'w', encoding='utf-8', newline='') as f:
-            fieldnames = [
-                'reviewer_name', 'reviewer_profile_url', 'reviewer_profile_pic',
-                'stars', 'text', 'date', 'photos'
-            ]
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES)
             writer.writeheader()
 
 def save_reviews_batch(reviews, config, is_first_batch=False):
-    """Save a batch of reviews to the output file."""
+    """Save a batch of Review records to the output file."""
     if not reviews:
         return 0
     
@@ -79,19 +244,17 @@ def save_reviews_batch(reviews, config, is_first_batch=False):
     if format == 'json':
         with open(config.output_path, 'a', encoding='utf-8') as f:
             for i, review in enumerate(reviews):
+                review = review.to_dict()
                 # Add comma before each item except the first item of the first batch
                 prefix = "" if is_first_batch and i == 0 else ","
                 json_str = json.dumps(review, ensure_ascii=False, indent=2)
                 f.write(f"{prefix}\n{json_str}")
     else:  # csv
         with open(config.output_path, 'a', encoding='utf-8', newline='') as f:
-            fieldnames = [
-                'reviewer_name', 'reviewer_profile_url', 'reviewer_profile_pic',
-                'stars', 'text', 'date', 'photos'
-            ]
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES)
             
             for review in reviews:
+                review = review.to_dict()
                 csv_row = {}
                 # Handle reviewer info
                 if 'reviewer' in review and isinstance(review['reviewer'], dict):
@@ -114,6 +277,10 @@ def save_reviews_batch(reviews, config, is_first_batch=False):
                 else:
                     csv_row['photos'] = ''
                 
+                # Local copies written by the media stage
+                csv_row['reviewer_profile_pic_path'] = review.get('reviewer', {}).get('profile_pic_path', '')
+                csv_row['photo_paths'] = '; '.join(p or '' for p in review.get('photo_paths', []))
+                
                 writer.writerow(csv_row)
     
     return len(reviews)
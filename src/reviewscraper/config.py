@@ -9,6 +9,16 @@ class Settings(BaseModel):
     output_path: str = "out.json"
     headless: bool = True
     output_format: str = "json"    # Added output_format parameter
+    media_dir: Optional[str] = None    # Download photos/avatars here when set
+    media_size: Optional[int] = None   # Rewrite image URLs to this =sNNN size
+    media_workers: int = 8             # Concurrent media downloads
+    rate_limit: Optional[float] = None        # Starting listugcposts requests/second
+    place_rate_limit: Optional[float] = None  # Starting place page loads/second
+    rate_limit_dir: Optional[str] = None      # Share rate limits across processes via files here
+    cache_dir: Optional[str] = None    # Cache review page responses here when set
+    cache_ttl: float = 7 * 24 * 3600   # Seconds before a cached page is refetched
+    cache_max_mb: int = 256            # Evict least recently used pages beyond this size
+    cache_only: bool = False           # Replay from cache_dir without opening a browser
 
     # If you still want URL validation but need a string output, you can use a validator:
     # from pydantic import validator
@@ -0,0 +1,313 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+@dataclass
+class Job:
+    """A leased unit of work: one place URL plus optional scrape options."""
+    id: int
+    url: str
+    options: Dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+    token: str = ""
+    # Set by the heartbeat once another worker may have taken over the job
+    lease_lost: threading.Event = field(default_factory=threading.Event, repr=False, compare=False)
+
+class LeaseLost(Exception):
+    """Raised by a handler that stops early because its job's lease was lost."""
+
+class JobQueue(ABC):
+    """Interface every queue backend implements.
+
+    Workers only ever talk to this interface, so a broker other than the
+    SQLite reference backend (Redis, SQS, ...) can be dropped in by
+    subclassing and overriding these methods.
+    """
+
+    @abstractmethod
+    def enqueue(self, url: str, options: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    def lease(self, worker_id: str, visibility_timeout: float) -> Optional[Job]:
+        ...
+
+    @abstractmethod
+    def heartbeat(self, job: Job, visibility_timeout: float) -> bool:
+        ...
+
+    @abstractmethod
+    def ack(self, job: Job) -> bool:
+        ...
+
+    @abstractmethod
+    def nack(self, job: Job, error: str = "", retry_delay: float = 0.0) -> bool:
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        ...
+
+class SQLiteJobQueue(JobQueue):
+    """Job queue stored in a single SQLite file, e.g. on shared storage.
+
+    A job is leased by stamping it with an owner, a random token and an
+    expiry time inside an IMMEDIATE transaction, so two workers can never
+    lease the same job. A lease that is not extended by ``heartbeat`` before
+    it expires becomes visible again, which is how jobs held by crashed
+    workers get retried. Jobs that fail ``max_attempts`` times are parked
+    with status ``failed`` instead of being retried forever.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id            INTEGER PRIMARY KEY AUTOINCREMENT,
+            url           TEXT NOT NULL UNIQUE,
+            options       TEXT NOT NULL DEFAULT '{}',
+            status        TEXT NOT NULL DEFAULT 'pending',
+            attempts      INTEGER NOT NULL DEFAULT 0,
+            lease_owner   TEXT,
+            lease_token   TEXT,
+            lease_expires REAL,
+            available_at  REAL NOT NULL DEFAULT 0,
+            last_error    TEXT,
+            updated_at    REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available_at);
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3, busy_timeout: float = 30.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, timeout=busy_timeout, isolation_level=None, check_same_thread=False
+        )
+        with self._lock:
+            self._conn.executescript(self.SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _write(self, fn: Callable[[sqlite3.Cursor], Any]) -> Any:
+        """Run ``fn`` inside a write-locked transaction."""
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(cur)
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+            cur.execute("COMMIT")
+            return result
+
+    def enqueue(self, url: str, options: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        """Add a place URL; returns the job id, or None if it is already queued.
+
+        A URL whose job is ``done`` or ``failed`` is reset to ``pending`` with
+        the new options, so recurring crawls can enqueue the same places again.
+        """
+        payload = json.dumps(options or {}, sort_keys=True)
+
+        def insert(cur):
+            now = time.time()
+            cur.execute("SELECT id, status FROM jobs WHERE url = ?", (url,))
+            row = cur.fetchone()
+            if row is None:
+                cur.execute(
+                    "INSERT INTO jobs (url, options, updated_at) VALUES (?, ?, ?)",
+                    (url, payload, now),
+                )
+                return cur.lastrowid
+            job_id, status = row
+            if status in ("pending", "leased"):
+                return None
+            cur.execute(
+                """UPDATE jobs SET status = 'pending', options = ?, attempts = 0,
+                          lease_owner = NULL, lease_token = NULL, lease_expires = NULL,
+                          available_at = 0, last_error = NULL, updated_at = ?
+                   WHERE id = ?""",
+                (payload, now, job_id),
+            )
+            return job_id
+
+        return self._write(insert)
+
+    def lease(self, worker_id: str, visibility_timeout: float) -> Optional[Job]:
+        """Lease the oldest available job, including ones whose lease expired."""
+        def take(cur):
+            now = time.time()
+            # Jobs whose worker died on their last allowed attempt are parked
+            cur.execute(
+                """UPDATE jobs SET status = 'failed', lease_owner = NULL, lease_token = NULL,
+                          lease_expires = NULL, last_error = 'lease expired', updated_at = ?
+                   WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?""",
+                (now, now, self.max_attempts),
+            )
+            cur.execute(
+                """SELECT id, url, options, attempts FROM jobs
+                   WHERE (status = 'pending' AND available_at <= ?)
+                      OR (status = 'leased' AND lease_expires < ?)
+                   ORDER BY id LIMIT 1""",
+                (now, now),
+            )
+            row = cur.fetchone()
+            if row is None:
+                return None
+            job_id, url, options, attempts = row
+            token = uuid.uuid4().hex
+            cur.execute(
+                """UPDATE jobs SET status = 'leased', attempts = attempts + 1,
+                          lease_owner = ?, lease_token = ?, lease_expires = ?, updated_at = ?
+                   WHERE id = ?""",
+                (worker_id, token, now + visibility_timeout, now, job_id),
+            )
+            return Job(job_id, url, json.loads(options), attempts + 1, token)
+
+        return self._write(take)
+
+    def heartbeat(self, job: Job, visibility_timeout: float) -> bool:
+        """Extend the lease; returns False if the lease was lost to another worker."""
+        def extend(cur):
+            now = time.time()
+            cur.execute(
+                """UPDATE jobs SET lease_expires = ?, updated_at = ?
+                   WHERE id = ? AND status = 'leased' AND lease_token = ?""",
+                (now + visibility_timeout, now, job.id, job.token),
+            )
+            return cur.rowcount == 1
+
+        return self._write(extend)
+
+    def ack(self, job: Job) -> bool:
+        """Mark the job done; returns False if the lease was lost."""
+        def done(cur):
+            cur.execute(
+                """UPDATE jobs SET status = 'done', lease_owner = NULL, lease_token = NULL,
+                          lease_expires = NULL, last_error = NULL, updated_at = ?
+                   WHERE id = ? AND lease_token = ?""",
+                (time.time(), job.id, job.token),
+            )
+            return cur.rowcount == 1
+
+        return self._write(done)
+
+    def nack(self, job: Job, error: str = "", retry_delay: float = 0.0) -> bool:
+        """Requeue the job after a failure, or park it once max_attempts is reached."""
+        def fail(cur):
+            now = time.time()
+            status = "failed" if job.attempts >= self.max_attempts else "pending"
+            cur.execute(
+                """UPDATE jobs SET status = ?, lease_owner = NULL, lease_token = NULL,
+                          lease_expires = NULL, available_at = ?, last_error = ?, updated_at = ?
+                   WHERE id = ? AND lease_token = ?""",
+                (status, now + retry_delay, error, now, job.id, job.token),
+            )
+            return cur.rowcount == 1
+
+        return self._write(fail)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of jobs per status."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        return {status: count for status, count in rows}
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class _Heartbeat(threading.Thread):
+    """Keeps a job's lease alive while the handler is running."""
+
+    def __init__(self, queue: JobQueue, job: Job, visibility_timeout: float):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.job = job
+        self.visibility_timeout = visibility_timeout
+        self.interval = max(visibility_timeout / 3, 0.01)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                if not self.queue.heartbeat(self.job, self.visibility_timeout):
+                    print(f"Lost lease on job {self.job.id} ({self.job.url})")
+                    self.job.lease_lost.set()
+                    return
+            except Exception as e:
+                print(f"Heartbeat failed for job {self.job.id}: {str(e)}")
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+def run_worker(queue: JobQueue, handler: Callable[[Job], Any],
+               worker_id: Optional[str] = None, visibility_timeout: float = 300.0,
+               poll_interval: float = 5.0, retry_delay: float = 60.0,
+               max_jobs: Optional[int] = None, exit_when_empty: bool = False,
+               finish: Optional[Callable[[Job, bool], Any]] = None) -> int:
+    """Lease jobs from ``queue`` and run ``handler`` on each until told to stop.
+
+    Each worker pulls its next job only when it is free, so load spreads
+    across hosts without partitioning the URL list up front. The lease is
+    heartbeated while ``handler`` runs; the job is acked when it returns and
+    requeued (after ``retry_delay`` seconds) when it raises. If the lease is
+    lost, ``job.lease_lost`` is set so the handler can stop writing output,
+    and the job is neither acked nor requeued since another worker owns it.
+    ``finish(job, acked)`` runs last, so a handler that writes to a file
+    unique to the attempt can move it into place only once the ack went
+    through and discard it otherwise. Returns the number of jobs completed successfully.
+    """
+    worker_id = worker_id or default_worker_id()
+    completed = 0
+    processed = 0
+
+    while max_jobs is None or processed < max_jobs:
+        job = queue.lease(worker_id, visibility_timeout)
+        if job is None:
+            if exit_when_empty:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        processed += 1
+        print(f"[{worker_id}] Leased job {job.id} (attempt {job.attempts}): {job.url}")
+        heartbeat = _Heartbeat(queue, job, visibility_timeout)
+        heartbeat.start()
+        error = None
+        try:
+            handler(job)
+        except Exception as e:
+            error = e
+        heartbeat.stop()
+
+        acked = False
+        if job.lease_lost.is_set():
+            print(f"[{worker_id}] Abandoned job {job.id}: its lease was lost to another worker")
+        elif error is not None:
+            print(f"[{worker_id}] Job {job.id} failed: {str(error)}")
+            queue.nack(job, error=str(error), retry_delay=retry_delay)
+        elif queue.ack(job):
+            acked = True
+            completed += 1
+            print(f"[{worker_id}] Finished job {job.id}")
+        else:
+            print(f"[{worker_id}] Abandoned job {job.id}: its lease was lost to another worker")
+        
+        if finish:
+            finish(job, acked)
+
+    return completed
@@ -0,0 +1,233 @@
+import hashlib
+import http.client
+import mimetypes
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+from .models import Review
+
+# Google image URLs carry their rendering options after the last "=",
+# e.g. ".../ALV-UjWekAZG=s120-c-rp-mo-ba4-br100"
+_SIZE_OPTION = re.compile(r'^(s\d+|w\d+|h\d+)$')
+
+def resize_url(url: str, size: int) -> str:
+    """Rewrite the ``=s120-...`` suffix of a Google image URL to ``size`` pixels."""
+    base, sep, options = url.rpartition('=')
+    if not sep or '/' in options:
+        return f"{url}=s{size}"
+    kept = [opt for opt in options.split('-') if opt and not _SIZE_OPTION.match(opt)]
+    return f"{base}=" + '-'.join([f"s{size}"] + kept)
+
+class MediaCache:
+    """Content-addressed store for downloaded images.
+
+    Files are named after the SHA-256 of their bytes, so the same image
+    fetched through different URLs, places or runs is stored once. An
+    SQLite index maps each URL to its file so known URLs are never fetched
+    again.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(root, "index.db"), timeout=30, check_same_thread=False
+        )
+        with self._lock, self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS media (
+                       url          TEXT PRIMARY KEY,
+                       digest       TEXT NOT NULL,
+                       path         TEXT NOT NULL,
+                       content_type TEXT,
+                       size         INTEGER NOT NULL,
+                       fetched_at   REAL NOT NULL
+                   )"""
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def lookup(self, url: str) -> Optional[str]:
+        """Return the local path for ``url`` if it was downloaded before."""
+        with self._lock:
+            row = self._conn.execute("SELECT path FROM media WHERE url = ?", (url,)).fetchone()
+        if row and os.path.exists(row[0]):
+            return row[0]
+        return None
+
+    def store(self, url: str, body: bytes, content_type: Optional[str] = None) -> str:
+        """Write ``body`` under its content hash (once) and index it for ``url``."""
+        digest = hashlib.sha256(body).hexdigest()
+        ext = mimetypes.guess_extension((content_type or "").split(';')[0].strip()) or ""
+        directory = os.path.join(self.root, "objects", digest[:2])
+        path = os.path.join(directory, digest + ext)
+
+        if not os.path.exists(path):
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?, ?, ?)",
+                (url, digest, path, content_type, len(body), time.time()),
+            )
+        return path
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections with a cap on concurrent requests per host."""
+
+    def __init__(self, per_host: int = 4, timeout: float = 30.0):
+        self.per_host = per_host
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._idle: Dict[Tuple[str, str], List[http.client.HTTPConnection]] = {}
+        self._limits: Dict[Tuple[str, str], threading.BoundedSemaphore] = {}
+
+    def _limit(self, key):
+        with self._lock:
+            if key not in self._limits:
+                self._limits[key] = threading.BoundedSemaphore(self.per_host)
+            return self._limits[key]
+
+    def _checkout(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop()
+        scheme, netloc = key
+        cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        return cls(netloc, timeout=self.timeout)
+
+    def _checkin(self, key, conn):
+        with self._lock:
+            self._idle.setdefault(key, []).append(conn)
+
+    def get(self, url: str) -> Tuple[int, Dict[str, str], bytes]:
+        """GET ``url``; returns (status, lower-cased headers, body)."""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = parts.path or '/'
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        with self._limit(key):
+            # A pooled connection may have been closed by the server; retry once
+            for attempt in range(2):
+                conn = self._checkout(key)
+                try:
+                    conn.request('GET', path, headers={'User-Agent': 'Mozilla/5.0'})
+                    response = conn.getresponse()
+                    body = response.read()
+                except (http.client.HTTPException, OSError):
+                    conn.close()
+                    if attempt:
+                        raise
+                    continue
+                headers = {k.lower(): v for k, v in response.getheaders()}
+                if response.will_close:
+                    conn.close()
+                else:
+                    self._checkin(key, conn)
+                return response.status, headers, body
+        raise RuntimeError("unreachable")
+
+    def close(self) -> None:
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+class MediaDownloader:
+    """Download photos and avatars concurrently into a MediaCache."""
+
+    def __init__(self, cache: MediaCache, max_workers: int = 8, per_host: int = 4,
+                 size: Optional[int] = None, timeout: float = 30.0, max_redirects: int = 3):
+        self.cache = cache
+        self.max_workers = max_workers
+        self.size = size
+        self.max_redirects = max_redirects
+        self.pool = ConnectionPool(per_host=per_host, timeout=timeout)
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def source_url(self, url: str) -> str:
+        """The URL actually fetched, after applying the size variant if any.
+
+        Only URLs that already carry ``=...`` image options are rewritten.
+        """
+        if self.size and '=' in url.rsplit('/', 1)[-1]:
+            return resize_url(url, self.size)
+        return url
+
+    def fetch(self, url: str) -> Optional[str]:
+        """Download one URL (unless cached) and return its local path."""
+        cached = self.cache.lookup(url)
+        if cached:
+            return cached
+
+        target = url
+        for _ in range(self.max_redirects + 1):
+            status, headers, body = self.pool.get(target)
+            if status in (301, 302, 303, 307, 308) and 'location' in headers:
+                target = urljoin(target, headers['location'])
+                continue
+            if status != 200:
+                print(f"Failed to download {url}: HTTP {status}")
+                return None
+            return self.cache.store(url, body, headers.get('content-type'))
+        print(f"Failed to download {url}: too many redirects")
+        return None
+
+    def download_many(self, urls: Iterable[str]) -> Dict[str, str]:
+        """Download every distinct URL; returns a map of original URL to local path."""
+        sources = {}
+        for url in urls:
+            if url and url not in sources:
+                sources[url] = self.source_url(url)
+
+        def task(source):
+            try:
+                return self.fetch(source)
+            except Exception as e:
+                print(f"Failed to download {source}: {str(e)}")
+                return None
+
+        distinct = list(set(sources.values()))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            paths = dict(zip(distinct, executor.map(task, distinct)))
+
+        return {url: paths[source] for url, source in sources.items() if paths[source]}
+
+def download_review_media(reviews: List[Review], downloader: MediaDownloader) -> int:
+    """Download the photos and avatars of ``reviews`` and record their local paths.
+
+    Returns the number of URLs that now have a local copy.
+    """
+    urls: List[str] = []
+    for review in reviews:
+        urls.extend(review.photos)
+        if review.reviewer.profile_pic:
+            urls.append(review.reviewer.profile_pic)
+
+    paths = downloader.download_many(urls)
+
+    for review in reviews:
+        if review.photos:
+            review.photo_paths = tuple(paths.get(url) for url in review.photos)
+        if review.reviewer.profile_pic:
+            review.reviewer.profile_pic_path = paths.get(review.reviewer.profile_pic)
+    return len(paths)
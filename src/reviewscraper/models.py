@@ -0,0 +1,166 @@
+import hashlib
+import json
+import re
+import sys
+from typing import Any, Dict, Optional, Tuple
+
+# prefix / per-record key / suffix, e.g.
+#   https://www.google.com/maps/contrib/ | 1012194315730 | ?hl=id
+#   https://lh3.googleusercontent.com/a/ | ACg8ocLoIKm... | =s120-c-rp-mo-br100
+_URL_PARTS = re.compile(r'^(.*/)([^/?=]*)(.*)$', re.DOTALL)
+
+def split_url(url: Optional[str]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Split a URL into an interned prefix, its unique part and an interned suffix.
+
+    Profile and avatar URLs only differ in the middle segment, so interning
+    the host/path prefix and the ``?hl=id`` / ``=s120-...`` suffix means each
+    record only pays for the part that is actually unique.
+    """
+    if not isinstance(url, str):
+        return None, None, None
+    match = _URL_PARTS.match(url)
+    if not match:
+        return "", url, ""
+    prefix, key, suffix = match.groups()
+    return sys.intern(prefix), key, sys.intern(suffix)
+
+def join_url(prefix: Optional[str], key: Optional[str], suffix: Optional[str]) -> Optional[str]:
+    if key is None:
+        return None
+    return f"{prefix}{key}{suffix}"
+
+def to_stars(value: Any) -> Optional[int]:
+    """Normalize a rating such as ``5`` or the API's ``[5]`` to a small int."""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def to_micros(value: Any) -> Optional[int]:
+    """Return an epoch-microseconds timestamp (e.g. ``1742994704171733``) as int."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+class Reviewer:
+    """Reviewer of a single review, stored with interned URL prefixes."""
+
+    __slots__ = (
+        "name",
+        "_url_prefix", "_url_key", "_url_suffix",
+        "_pic_prefix", "_pic_key", "_pic_suffix",
+        "profile_pic_path",
+    )
+
+    def __init__(self, name: Optional[str] = None, profile_url: Optional[str] = None,
+                 profile_pic: Optional[str] = None):
+        self.name = name
+        self.profile_url = profile_url
+        self.profile_pic = profile_pic
+        self.profile_pic_path: Optional[str] = None
+
+    @property
+    def profile_url(self) -> Optional[str]:
+        return join_url(self._url_prefix, self._url_key, self._url_suffix)
+
+    @profile_url.setter
+    def profile_url(self, value: Optional[str]) -> None:
+        self._url_prefix, self._url_key, self._url_suffix = split_url(value)
+
+    @property
+    def profile_pic(self) -> Optional[str]:
+        return join_url(self._pic_prefix, self._pic_key, self._pic_suffix)
+
+    @profile_pic.setter
+    def profile_pic(self, value: Optional[str]) -> None:
+        self._pic_prefix, self._pic_key, self._pic_suffix = split_url(value)
+
+    def _key(self):
+        return (self.name, self._url_key, self._pic_key)
+
+    def __eq__(self, other):
+        if not isinstance(other, Reviewer):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f"Reviewer(name={self.name!r}, profile_url={self.profile_url!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self.name is None and self._url_key is None and self._pic_key is None:
+            return {}
+        data = {
+            "name": self.name,
+            "profile_url": self.profile_url,
+            "profile_pic": self.profile_pic,
+        }
+        if self.profile_pic_path:
+            data["profile_pic_path"] = self.profile_pic_path
+        return data
+
+class Review:
+    """A single review: stars as a small int, date as int epoch microseconds.
+
+    Records stay in this compact form for the whole scrape; ``to_dict`` is
+    only called by the output sink.
+    """
+
+    __slots__ = ("review_id", "reviewer", "stars", "text", "date", "photos", "photo_paths")
+
+    def __init__(self, reviewer: Optional[Reviewer] = None, stars: Any = None,
+                 text: Optional[str] = "", date: Any = None, photos=(),
+                 review_id: Optional[str] = None):
+        self.review_id = review_id
+        self.reviewer = reviewer if reviewer is not None else Reviewer()
+        self.stars = to_stars(stars)
+        self.text = text
+        self.date = to_micros(date)
+        self.photos = tuple(photos) if photos else ()
+        self.photo_paths: Tuple[Optional[str], ...] = ()
+
+    def _key(self):
+        return (self.review_id, self.reviewer, self.stars, self.text, self.date, self.photos)
+
+    def fingerprint(self) -> str:
+        """Stable identity for deduplication: the API's review ID, or a content digest."""
+        if self.review_id:
+            return self.review_id
+        content = json.dumps([self.reviewer.name, self.reviewer._url_key, self.reviewer._pic_key,
+                              self.stars, self.text, self.date, self.photos])
+        return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+    def __eq__(self, other):
+        if not isinstance(other, Review):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return (f"Review(reviewer={self.reviewer.name!r}, stars={self.stars!r}, "
+                f"date={self.date!r})")
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "reviewer": self.reviewer.to_dict(),
+            "stars": self.stars,
+            "text": self.text,
+            "date": self.date,
+        }
+        if self.photos:
+            data["photos"] = list(self.photos)
+        if self.photo_paths:
+            data["photo_paths"] = list(self.photo_paths)
+        return data
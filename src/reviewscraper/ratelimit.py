@@ -0,0 +1,218 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, TypeVar
+from .utils import backoff_delay
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+
+T = TypeVar("T")
+
+# Starting rates in requests per second for the endpoints the scraper hits
+DEFAULT_RATES = {
+    "listugcposts": 0.5,
+    "place": 0.2,
+}
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    ``reserve`` takes tokens immediately (the balance may go negative) and
+    returns how long the caller has to wait, so the same bucket serves
+    blocking threads (``acquire``) and asyncio tasks (``acquire_async``).
+    A refill time in the future means the bucket is paused.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._state = self._initial_state(rate)
+
+    def _initial_state(self, rate: float) -> Dict[str, float]:
+        return {"tokens": self.capacity, "last": time.time(), "rate": rate,
+                "failures": 0, "backoff_until": 0.0}
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            yield self._state
+
+    def _refill(self, state, now):
+        if now > state["last"]:
+            elapsed = now - state["last"]
+            state["tokens"] = min(self.capacity, state["tokens"] + elapsed * state["rate"])
+            state["last"] = now
+
+    @property
+    def rate(self) -> float:
+        with self._transaction() as state:
+            return state["rate"]
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take ``tokens`` and return the number of seconds to wait before using them."""
+        with self._transaction() as state:
+            now = time.time()
+            self._refill(state, now)
+            state["tokens"] -= tokens
+            deficit = max(0.0, -state["tokens"])
+            return max(0.0, state["last"] - now) + deficit / state["rate"]
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are available; returns the time spent waiting."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def _pause(self, state, now, seconds):
+        state["tokens"] = min(state["tokens"], 0.0)
+        state["last"] = max(state["last"], now + seconds)
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for ``seconds``, for every user of the bucket."""
+        self.update(lambda state, now: self._pause(state, now, seconds))
+
+    def update(self, fn: Callable[[Dict[str, float], float], T]) -> T:
+        """Run ``fn(state, now)`` atomically on the refilled state and return its result."""
+        with self._transaction() as state:
+            now = time.time()
+            self._refill(state, now)
+            return fn(state, now)
+
+    def update_rate(self, fn: Callable[[float], float]) -> float:
+        """Atomically replace the rate with ``fn(rate)``; returns the new rate."""
+        def replace(state, now):
+            state["rate"] = fn(state["rate"])
+            return state["rate"]
+
+        return self.update(replace)
+
+class FileTokenBucket(TokenBucket):
+    """Token bucket whose state lives in a JSON file guarded by ``flock``.
+
+    Every process that opens the same path shares one budget, so workers on
+    a host (or on shared storage with working locks) pace themselves together.
+    The rate stored in the file wins over the one passed by later processes.
+    """
+
+    def __init__(self, path: str, rate: float, capacity: float = 1.0):
+        if fcntl is None:
+            raise RuntimeError("FileTokenBucket requires fcntl (POSIX only)")
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        super().__init__(rate, capacity)
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock, open(self.path, "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                content = f.read()
+                state = json.loads(content) if content else dict(self._state)
+                yield state
+                f.seek(0)
+                f.truncate()
+                json.dump(state, f)
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+class AdaptiveRateLimiter:
+    """AIMD rate control on top of a TokenBucket.
+
+    Each success raises the rate by ``increase`` requests/second up to
+    ``max_rate``, slowly probing for the highest sustainable rate. A
+    throttling signal (429/5xx or an empty page) multiplies the rate by
+    ``decrease`` and pauses the shared bucket for an exponentially growing,
+    fully jittered delay, so all workers back off together.
+
+    The failure count and the end of the current backoff window live in the
+    bucket state, so they are shared by every thread and process using the
+    bucket. Signals arriving inside the window belong to the same wave and
+    do not cut the rate or extend the pause again.
+    """
+
+    def __init__(self, bucket: TokenBucket, min_rate: float = 0.05, max_rate: float = 5.0,
+                 increase: float = 0.02, decrease: float = 0.5,
+                 base_delay: float = 1.0, max_delay: float = 60.0):
+        self.bucket = bucket
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    @property
+    def failures(self) -> int:
+        return int(self.bucket.update(lambda state, now: state.get("failures", 0)))
+
+    def wait(self) -> float:
+        return self.bucket.acquire()
+
+    async def wait_async(self) -> float:
+        return await self.bucket.acquire_async()
+
+    def success(self) -> float:
+        def probe(state, now):
+            state["failures"] = 0
+            state["rate"] = min(self.max_rate, state["rate"] + self.increase)
+            return state["rate"]
+
+        return self.bucket.update(probe)
+
+    def throttled(self) -> float:
+        """Record a throttling signal; returns the pause still in effect."""
+        def back_off(state, now):
+            if now < state.get("backoff_until", 0.0):
+                # Someone already backed off for this wave
+                return max(0.0, state["last"] - now)
+            failures = state.get("failures", 0) + 1
+            state["failures"] = failures
+            state["rate"] = max(self.min_rate, state["rate"] * self.decrease)
+            state["backoff_until"] = now + backoff_delay(
+                failures, self.base_delay, self.max_delay, jitter=False)
+            delay = backoff_delay(failures, self.base_delay, self.max_delay, jitter=True)
+            self.bucket._pause(state, now, delay)
+            return delay
+
+        return self.bucket.update(back_off)
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(endpoint: str, rate: Optional[float] = None,
+                state_dir: Optional[str] = None, **kwargs) -> AdaptiveRateLimiter:
+    """Return the limiter shared by every caller in this process for ``endpoint``.
+
+    With ``state_dir`` the bucket is file-backed and also shared with other
+    processes using the same directory. Arguments only apply on first use.
+    """
+    key = f"{state_dir or ''}:{endpoint}"
+    with _limiters_lock:
+        if key not in _limiters:
+            rate = rate or DEFAULT_RATES.get(endpoint, 1.0)
+            if state_dir:
+                bucket: TokenBucket = FileTokenBucket(
+                    os.path.join(state_dir, f"{endpoint}.json"), rate)
+            else:
+                bucket = TokenBucket(rate)
+            _limiters[key] = AdaptiveRateLimiter(bucket, **kwargs)
+        return _limiters[key]
@@ -1,4 +1,5 @@
 import logging
+import random
 from functools import wraps
 import time
 
@@ -7,7 +8,13 @@ def setup_logger(name: str) -> logging.Logger:
     logging.basicConfig(format=fmt, level=logging.INFO)
     return logging.getLogger(name)
 
-def retry(exc_types: tuple, tries: int = 3, delay: float = 1.0):
+def backoff_delay(attempt: int, base: float, cap: float, jitter: bool = True) -> float:
+    """Exponential backoff for the given 1-based attempt, with optional full jitter."""
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return random.uniform(0, delay) if jitter else delay
+
+def retry(exc_types: tuple, tries: int = 3, delay: float = 1.0,
+          exponential: bool = False, max_delay: float = 60.0):
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
@@ -16,7 +23,10 @@ def retry(exc_types: tuple, tries: int = 3, delay: float = 1.0):
                     return fn(*args, **kwargs)
                 except exc_types as e:
                     logging.warning(f"Retry {i+1}/{tries} after {e}")
-                    time.sleep(delay)
+                    if exponential:
+                        time.sleep(backoff_delay(i + 1, delay, max_delay))
+                    else:
+                        time.sleep(delay)
             return fn(*args, **kwargs)
         return wrapper
     return decorator
@@ -0,0 +1,119 @@
+import json
+import os
+import time
+import pytest
+from reviewscraper.api_scraper import scrape_reviews_api
+from reviewscraper.cache import (ResponseCache, page_key, page_key_from_url, page_token_from_url,
+                                 place_id_from_url, sort_order_from_url)
+from reviewscraper.config import Settings
+
+PAGE_URL = ("https://www.google.com/maps/rpc/listugcposts?authuser=0&hl=id&gl=id"
+            "&pb=!1m6!1s0x2e7a5d:0x82feaae12f4ab48e!6m4!4m1!1e1!4m1!1e3"
+            "!2m2!1i10!2sCAESY0NBRVFD%3D%3D!5m2!4sabc!7e81!13m1!1e2")
+
+@pytest.fixture
+def cache(tmp_path):
+    c = ResponseCache(str(tmp_path / "cache"))
+    yield c
+    c.close()
+
+def test_parse_listugcposts_url():
+    assert place_id_from_url(PAGE_URL) == "0x2e7a5d:0x82feaae12f4ab48e"
+    assert page_token_from_url(PAGE_URL) == "CAESY0NBRVFD=="
+    assert page_token_from_url(PAGE_URL.replace("!2m2!1i10!2sCAESY0NBRVFD%3D%3D", "!2m1!1i10")) == ""
+    assert place_id_from_url("https://maps.app.goo.gl/abc") is None
+    assert sort_order_from_url(PAGE_URL) == "2"
+    assert sort_order_from_url(PAGE_URL.replace("!13m1!1e2", "")) == "default"
+
+def test_page_key_uses_the_requests_own_sort():
+    first_page = PAGE_URL.replace("!2m2!1i10!2sCAESY0NBRVFD%3D%3D", "!2m1!1i10")
+    default_sort = first_page.replace("!13m1!1e2", "")
+    assert page_key_from_url(first_page) == "0x2e7a5d:0x82feaae12f4ab48e|2|"
+    assert page_key_from_url(default_sort) == "0x2e7a5d:0x82feaae12f4ab48e|default|"
+    assert page_key_from_url(PAGE_URL) == "0x2e7a5d:0x82feaae12f4ab48e|2|CAESY0NBRVFD=="
+    assert page_key_from_url("https://www.google.com/maps/rpc/listugcposts?pb=!2m1") is None
+
+def test_round_trip_and_stats(cache):
+    key = page_key("0x1:0x2", "desc", "")
+    assert cache.get(key) is None
+    cache.put(key, b")]}'\n[null]" * 100, {"content-type": "application/json"})
+    body, headers = cache.get(key)
+    assert body == b")]}'\n[null]" * 100
+    assert headers == {"content-type": "application/json"}
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["entries"] == 1
+    assert stats["bytes"] < 1100  # stored compressed
+
+def test_ttl_expiry(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache"), ttl=0.01)
+    cache.put("k", b"body")
+    time.sleep(0.02)
+    assert cache.get("k", allow_stale=True) is not None
+    assert cache.get("k") is None
+    assert cache.get("k", allow_stale=True) is None
+    cache.close()
+
+def test_lru_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache"), max_bytes=2500)
+    cache.put("a", os.urandom(1000))  # random bytes do not compress
+    cache.put("b", os.urandom(1000))
+    time.sleep(0.01)
+    cache.get("a")  # "b" is now the least recently used
+    cache.put("c", os.urandom(1000))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+    cache.close()
+
+def test_run_record(cache):
+    url = "https://maps.app.goo.gl/abc"
+    assert cache.lookup_run(url, "desc") is None
+    cache.remember_run(url, "desc", [["a|default|", "a|2|"]], complete=False)
+    cache.remember_run(url, "desc", [["a|default|", "a|2|"], ["a|2|t1"]], complete=True)
+    assert cache.lookup_run(url, "desc") == ([["a|default|", "a|2|"], ["a|2|t1"]], True)
+    assert cache.lookup_run(url, "asc") is None
+
+def _page(review_ids, token):
+    blocks = []
+    for review_id in review_ids:
+        rating = [[5]] + [None] * 14 + [[[f"Review {review_id}"]]]
+        blocks.append([[review_id, [None, None, None, 1742994704171733], rating, None]])
+    return (")]}'\n" + json.dumps([None, token, blocks])).encode("utf-8")
+
+def _replay(tmp_path, **options):
+    cfg = Settings(place_url="https://maps.app.goo.gl/abc", cache_dir=str(tmp_path / "cache"),
+                   cache_only=True, **options)
+    return [review.review_id for review in scrape_reviews_api(cfg)]
+
+@pytest.fixture
+def recorded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # the parser writes debug dumps to the working directory
+    # Two-page token chain, plus the default-sort first page the live run also saw
+    cache = ResponseCache(str(tmp_path / "cache"))
+    cache.put("p|default|", _page(["d1", "r1"], "t0"))
+    cache.put("p|2|", _page(["r1", "r2"], "t1"))
+    cache.put("p|2|t1", _page(["r3"], None))
+    cache.remember_run("https://maps.app.goo.gl/abc", "desc",
+                       [["p|default|", "p|2|"], ["p|2|t1"]], complete=True)
+    yield cache
+    cache.close()
+
+def test_cache_only_replays_recorded_pages(tmp_path, recorded):
+    assert _replay(tmp_path) == ["d1", "r1", "r2", "r3"]
+    assert _replay(tmp_path, scroll_iterations=1) == ["d1", "r1", "r2"]
+
+def test_cache_only_warns_when_chain_is_cut(tmp_path, recorded, capsys):
+    recorded._conn.execute("DELETE FROM pages WHERE key = 'p|2|t1'")
+    recorded._conn.commit()
+    assert _replay(tmp_path) == ["d1", "r1", "r2"]
+    assert "p|2|t1 of iteration 2 is missing" in capsys.readouterr().out
+
+    recorded.remember_run("https://maps.app.goo.gl/abc", "desc",
+                          [["p|default|", "p|2|"]], complete=False)
+    assert _replay(tmp_path, scroll_iterations=3) == ["d1", "r1", "r2"]
+    assert "only covers 1 of 3 iterations" in capsys.readouterr().out
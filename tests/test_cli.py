@@ -1,6 +1,9 @@
+import json
 from click.testing import CliRunner
 import pytest
-from reviewscraper.cli import main
+from reviewscraper import cli
+from reviewscraper.cli import main, queue_cli
+from reviewscraper.models import Review, Reviewer
 
 @pytest.fixture
 def runner():
@@ -10,3 +13,29 @@ def test_cli_help(runner):
     result = runner.invoke(main, ['--help'])
     assert result.exit_code == 0
     assert 'Usage:' in result.output
+
+def test_work_moves_output_into_place_on_ack(runner, tmp_path, monkeypatch):
+    def fake_scrape(cfg, save_callback=None):
+        if cfg.place_url.endswith("bad"):
+            raise RuntimeError("scrape failed")
+        return save_callback([Review(Reviewer("Jeo"), stars=5, text="Bagus")], cfg, True)
+
+    monkeypatch.setattr(cli, "scrape_reviews_api", fake_scrape)
+    queue = str(tmp_path / "queue.db")
+    output = tmp_path / "output"
+    runner.invoke(queue_cli, ['enqueue', '--queue', queue, 'https://maps.example/ok',
+                              'https://maps.example/bad'])
+    result = runner.invoke(queue_cli, ['work', '--queue', queue, '--output-dir', str(output),
+                                       '--max-attempts', '1', '--exit-when-empty'])
+    assert result.exit_code == 0
+    # Failed attempts leave nothing behind
+    assert sorted(p.name for p in output.iterdir()) == ["place-1.json"]
+    assert json.loads((output / "place-1.json").read_text())[0]["text"] == "Bagus"
+
+def test_cache_only_without_cached_pages_fails_cleanly(runner, tmp_path):
+    output = tmp_path / "reviews.json"
+    result = runner.invoke(main, ['--url', 'https://maps.app.goo.gl/abc', '--output', str(output),
+                                  '--cache-dir', str(tmp_path / "cache"), '--cache-only'])
+    assert result.exit_code == 1
+    assert "No cached pages" in result.output
+    assert not output.exists()
@@ -0,0 +1,96 @@
+import time
+import pytest
+from reviewscraper.jobqueue import SQLiteJobQueue, run_worker
+
+@pytest.fixture
+def queue(tmp_path):
+    q = SQLiteJobQueue(str(tmp_path / "queue.db"), max_attempts=2)
+    yield q
+    q.close()
+
+def test_enqueue_deduplicates(queue):
+    assert queue.enqueue("https://maps.example/a") is not None
+    assert queue.enqueue("https://maps.example/a") is None
+    assert queue.stats() == {"pending": 1}
+
+def test_reenqueue_after_ack_resets_job(queue):
+    job_id = queue.enqueue("https://maps.example/a", {"sort_direction": "desc"})
+    queue.ack(queue.lease("w1", 60))
+    assert queue.enqueue("https://maps.example/a", {"sort_direction": "asc"}) == job_id
+    job = queue.lease("w1", 60)
+    assert job.id == job_id
+    assert job.attempts == 1
+    assert job.options == {"sort_direction": "asc"}
+    # A job that is currently leased is left alone
+    assert queue.enqueue("https://maps.example/a") is None
+
+def test_lease_is_exclusive(queue):
+    queue.enqueue("https://maps.example/a", {"sort_direction": "asc"})
+    job = queue.lease("w1", visibility_timeout=60)
+    assert job.url == "https://maps.example/a"
+    assert job.options == {"sort_direction": "asc"}
+    assert queue.lease("w2", visibility_timeout=60) is None
+
+def test_expired_lease_is_retried(queue):
+    queue.enqueue("https://maps.example/a")
+    stale = queue.lease("crashed", visibility_timeout=0.01)
+    time.sleep(0.02)
+    job = queue.lease("w2", visibility_timeout=60)
+    assert job.id == stale.id
+    assert job.attempts == 2
+    # The crashed worker can no longer touch the job
+    assert queue.ack(stale) is False
+    assert queue.heartbeat(stale, 60) is False
+    assert queue.ack(job) is True
+
+def test_nack_requeues_then_fails(queue):
+    queue.enqueue("https://maps.example/a")
+    queue.nack(queue.lease("w1", 60), error="boom")
+    assert queue.stats() == {"pending": 1}
+    queue.nack(queue.lease("w1", 60), error="boom")
+    assert queue.stats() == {"failed": 1}
+
+def test_run_worker_acks_and_requeues(queue):
+    queue.enqueue("https://maps.example/ok")
+    queue.enqueue("https://maps.example/bad")
+    seen = []
+    finished = []
+
+    def handler(job):
+        seen.append(job.url)
+        if job.url.endswith("bad"):
+            raise RuntimeError("scrape failed")
+
+    completed = run_worker(queue, handler, worker_id="w1", retry_delay=0, exit_when_empty=True,
+                           finish=lambda job, acked: finished.append(acked))
+    assert completed == 1
+    assert finished == [True, False, False]
+    assert seen == ["https://maps.example/ok", "https://maps.example/bad",
+                    "https://maps.example/bad"]
+    assert queue.stats() == {"done": 1, "failed": 1}
+
+def test_heartbeat_keeps_lease_alive(queue):
+    queue.enqueue("https://maps.example/slow")
+
+    def handler(job):
+        time.sleep(0.2)
+        assert queue.lease("w2", visibility_timeout=0.06) is None
+
+    assert run_worker(queue, handler, worker_id="w1", visibility_timeout=0.06,
+                      exit_when_empty=True) == 1
+
+def test_lost_lease_is_neither_acked_nor_requeued(queue):
+    queue.enqueue("https://maps.example/a")
+
+    def handler(job):
+        # Simulate another worker taking over after our lease expired
+        queue._write(lambda cur: cur.execute("UPDATE jobs SET lease_expires = 0"))
+        queue.lease("w2", visibility_timeout=60)
+        time.sleep(0.2)
+        assert job.lease_lost.is_set()
+
+    finished = []
+    assert run_worker(queue, handler, worker_id="w1", visibility_timeout=0.06, max_jobs=1,
+                      finish=lambda job, acked: finished.append(acked)) == 0
+    assert finished == [False]
+    assert queue.stats() == {"leased": 1}
@@ -0,0 +1,112 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from reviewscraper.media import MediaCache, MediaDownloader, download_review_media, resize_url
+from reviewscraper.models import Review, Reviewer
+
+IMAGES = {
+    "/a/avatar=s120-c-rp-mo-br100": b"avatar-bytes",
+    "/a/avatar=s64-c-rp-mo-br100": b"small-avatar-bytes",
+    "/p/one": b"photo-bytes",
+    "/p/same-as-one": b"photo-bytes",
+}
+
+class ImageServer(ThreadingHTTPServer):
+    """Local stand-in for the Google image hosts."""
+    daemon_threads = True
+
+    def __init__(self):
+        self.hits = []
+        super().__init__(("127.0.0.1", 0), ImageHandler)
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+class ImageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.hits.append(self.path)
+        if self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/p/one")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = IMAGES.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def server():
+    srv = ImageServer()
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+@pytest.fixture
+def cache(tmp_path):
+    c = MediaCache(str(tmp_path / "media"))
+    yield c
+    c.close()
+
+def test_resize_url():
+    assert resize_url("https://lh3.googleusercontent.com/a/X=s120-c-rp-mo-br100", 400) == \
+        "https://lh3.googleusercontent.com/a/X=s400-c-rp-mo-br100"
+    assert resize_url("https://lh3.googleusercontent.com/p/Y=w100-h100-k-no", 64) == \
+        "https://lh3.googleusercontent.com/p/Y=s64-k-no"
+    assert resize_url("https://lh3.googleusercontent.com/p/Y", 64) == \
+        "https://lh3.googleusercontent.com/p/Y=s64"
+
+def test_downloads_are_deduplicated_and_cached(server, cache):
+    downloader = MediaDownloader(cache, max_workers=4, per_host=2)
+    urls = [server.url("/p/one"), server.url("/p/same-as-one"), server.url("/p/one")]
+    paths = downloader.download_many(urls)
+
+    assert paths[urls[0]] == paths[urls[1]]
+    assert paths[urls[0]].endswith(".jpg")
+    with open(paths[urls[0]], "rb") as f:
+        assert f.read() == b"photo-bytes"
+    assert sorted(server.hits) == ["/p/one", "/p/same-as-one"]
+
+    # A second run only reads the index
+    assert downloader.download_many(urls) == paths
+    assert len(server.hits) == 2
+    downloader.close()
+
+def test_redirects_and_missing_files(server, cache):
+    downloader = MediaDownloader(cache)
+    paths = downloader.download_many([server.url("/redirect"), server.url("/missing")])
+    assert list(paths) == [server.url("/redirect")]
+    assert os.path.exists(paths[server.url("/redirect")])
+    downloader.close()
+
+def test_download_review_media_writes_paths_back(server, cache):
+    review = Review(
+        Reviewer("Jeo", "https://www.google.com/maps/contrib/1?hl=id",
+                 server.url("/a/avatar=s120-c-rp-mo-br100")),
+        stars=5, photos=[server.url("/p/one"), server.url("/missing")],
+    )
+    downloader = MediaDownloader(cache, size=64)
+    assert download_review_media([review], downloader) == 2
+
+    data = review.to_dict()
+    with open(data["reviewer"]["profile_pic_path"], "rb") as f:
+        assert f.read() == b"small-avatar-bytes"
+    assert data["photo_paths"][0].endswith(".jpg")
+    assert data["photo_paths"][1] is None
+    downloader.close()
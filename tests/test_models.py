@@ -0,0 +1,53 @@
+from reviewscraper.models import Review, Reviewer, split_url
+
+PROFILE = "https://www.google.com/maps/contrib/115795237996874612248?hl=id"
+AVATAR = "https://lh3.googleusercontent.com/a-/ALV-UjWekAZG=s120-c-rp-mo-ba4-br100"
+
+def test_split_url_interns_prefix_and_suffix():
+    a = split_url(PROFILE)
+    b = split_url("https://www.google.com/maps/contrib/101219431573097041647?hl=id")
+    assert a == ("https://www.google.com/maps/contrib/", "115795237996874612248", "?hl=id")
+    assert a[0] is b[0]
+    assert a[2] is b[2]
+    assert split_url(None) == (None, None, None)
+
+def test_reviewer_round_trips_urls():
+    reviewer = Reviewer(name="Jeo", profile_url=PROFILE, profile_pic=AVATAR)
+    assert reviewer.profile_url == PROFILE
+    assert reviewer.profile_pic == AVATAR
+    assert not hasattr(reviewer, "__dict__")
+
+def test_review_normalizes_stars_and_date():
+    review = Review(Reviewer(name="Jeo"), stars=[5], text="Bagus", date=1742994704171733)
+    assert review.stars == 5
+    assert review.date == 1742994704171733
+    assert Review(stars="4", date="not a timestamp").date is None
+
+def test_review_to_dict():
+    review = Review(Reviewer("Jeo", PROFILE, AVATAR), stars=[5], text="Bagus",
+                    date=1742994704171733)
+    assert review.to_dict() == {
+        "reviewer": {"name": "Jeo", "profile_url": PROFILE, "profile_pic": AVATAR},
+        "stars": 5,
+        "text": "Bagus",
+        "date": 1742994704171733,
+    }
+    assert Review(photos=["https://example.com/p.jpg"]).to_dict()["photos"] == \
+        ["https://example.com/p.jpg"]
+
+def test_reviews_deduplicate_by_value():
+    a = Review(Reviewer("Jeo", PROFILE, AVATAR), stars=5, text="Bagus", date=1)
+    b = Review(Reviewer("Jeo", PROFILE, AVATAR), stars=[5], text="Bagus", date=1)
+    assert a == b
+    assert len({a, b}) == 1
+
+def test_fingerprint_prefers_review_id():
+    a = Review(Reviewer("Jeo"), stars=5, text="Bagus", review_id="ChdDSUhNMG9n")
+    b = Review(Reviewer("Jeo"), stars=5, text="Bagus", review_id="ChZDSUhNMG9n")
+    assert a.fingerprint() == "ChdDSUhNMG9n"
+    assert a.fingerprint() != b.fingerprint()
+    # Without an ID the digest only depends on the content
+    c = Review(Reviewer("Jeo", PROFILE, AVATAR), stars=5, text="Bagus", date=1)
+    d = Review(Reviewer("Jeo", PROFILE, AVATAR), stars=[5], text="Bagus", date=1)
+    assert c.fingerprint() == d.fingerprint()
+    assert c.fingerprint() != Review(Reviewer("Jeo"), stars=4, text="Bagus", date=1).fingerprint()
@@ -0,0 +1,73 @@
+import multiprocessing
+import time
+import pytest
+from reviewscraper.ratelimit import AdaptiveRateLimiter, FileTokenBucket, TokenBucket, get_limiter
+from reviewscraper.utils import backoff_delay
+
+def test_bucket_spaces_out_requests():
+    bucket = TokenBucket(rate=10, capacity=1)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+def test_pause_delays_every_caller():
+    bucket = TokenBucket(rate=100, capacity=1)
+    bucket.pause(0.5)
+    assert bucket.reserve() == pytest.approx(0.51, abs=0.02)
+
+def test_adaptive_limiter_backs_off_and_probes_up():
+    limiter = AdaptiveRateLimiter(TokenBucket(rate=1.0), min_rate=0.1, max_rate=1.1,
+                                  increase=0.05, decrease=0.5, base_delay=0.05, max_delay=0.1)
+    delay = limiter.throttled()
+    assert 0 <= delay <= 0.05
+    assert limiter.rate == pytest.approx(0.5)
+    # The rest of the same wave neither cuts the rate nor grows the delay
+    limiter.throttled()
+    assert limiter.failures == 1
+    assert limiter.rate == pytest.approx(0.5)
+    time.sleep(0.06)
+    limiter.throttled()
+    assert limiter.failures == 2
+    assert limiter.rate == pytest.approx(0.25)
+    for _ in range(100):
+        limiter.success()
+    assert limiter.failures == 0
+    assert limiter.rate == pytest.approx(1.1)
+
+def test_one_backoff_per_wave_across_processes(tmp_path):
+    path = str(tmp_path / "bucket.json")
+    workers = [AdaptiveRateLimiter(FileTokenBucket(path, rate=1.0), base_delay=10)
+               for _ in range(3)]
+    for limiter in workers:
+        limiter.throttled()
+    assert workers[0].rate == pytest.approx(0.5)
+    assert workers[2].failures == 1
+
+def test_backoff_delay_is_capped():
+    assert backoff_delay(1, 1.0, 60.0, jitter=False) == 1.0
+    assert backoff_delay(4, 1.0, 60.0, jitter=False) == 8.0
+    assert backoff_delay(10, 1.0, 60.0, jitter=False) == 60.0
+    assert 0 <= backoff_delay(10, 1.0, 60.0) <= 60.0
+
+def test_get_limiter_is_shared(tmp_path):
+    assert get_limiter("listugcposts") is get_limiter("listugcposts")
+    shared = get_limiter("listugcposts", state_dir=str(tmp_path))
+    assert isinstance(shared.bucket, FileTokenBucket)
+
+def _reserve(path, queue):
+    queue.put(FileTokenBucket(path, rate=0.5).reserve())
+
+def test_file_bucket_is_shared_across_processes(tmp_path):
+    path = str(tmp_path / "bucket.json")
+    queue = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=_reserve, args=(path, queue)) for _ in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    waits = sorted(queue.get() for _ in procs)
+    assert waits[0] == 0
+    assert waits[1] > 1
+    assert waits[2] > 3
+    # The rate written by the first process wins
+    assert FileTokenBucket(path, rate=99).rate == 0.5